@@ -3,11 +3,12 @@ from pathlib import Path
 import yaml
 import sys
 import os
-from utils.data_processing.create_site_polygon import create_site_polygon, save_site_polygon
+from utils.data_processing.create_site_polygon import save_site_polygon
+from utils.data_processing.config_loader import load_yaml
 from utils.data_sources.fetch_geojson_buildings import GeoJSONBuildingProcessor
 from utils.CEA.process_citygml_buildings import process_citygml_buildings
-from simpledbf import Dbf5
 import geopandas as gpd
+import shapely
 import pandas as pd
 
 # Füge Projektverzeichnis zum Python-Path hinzu
@@ -76,8 +77,7 @@ def setup_project_structure(project_path, scenario_path):
     if not os.path.exists(config_path):
         raise FileNotFoundError(f"Template-Konfigurationsdatei nicht gefunden unter: {config_path}")
         
-    with open(config_path, 'r') as f:
-        config = yaml.safe_load(f)
+    config = load_yaml(config_path)
     
     # Erstelle Hauptverzeichnisse
     for path in [project_path, scenario_path]:
@@ -93,22 +93,22 @@ def setup_project_structure(project_path, scenario_path):
     if not scenario_config.exists():
         # Verwende den gleichen config_path wie oben
         if os.path.exists(config_path):
-            with open(config_path, 'r', encoding='utf-8') as src:
-                config = yaml.safe_load(src)
-                
-                # Aktualisiere den Szenariopfad für CEA
-                config['cea_settings']['scenario_path'] = str(scenario_path)
-                
-                with scenario_config.open('w', encoding='utf-8') as dst:
-                    yaml.dump(config, dst, allow_unicode=True)
+            config = load_yaml(config_path)
+
+            # Aktualisiere den Szenariopfad für CEA
+            config['cea_settings']['scenario_path'] = str(scenario_path)
+
+            with scenario_config.open('w', encoding='utf-8') as dst:
+                yaml.dump(config, dst, allow_unicode=True)
         else:
             raise FileNotFoundError(f"Template-Konfigurationsdatei nicht gefunden unter: {config_path}")
 
 def create_site_polygon(zone_path):
     """Erstellt ein Site-Polygon aus der Zone"""
     try:
-        zone_gdf = gpd.read_file(zone_path)
-        site_polygon = zone_gdf.unary_union.convex_hull
+        zone_gdf = gpd.read_file(zone_path, engine="pyogrio")
+        # Konvexe Hülle direkt aus den Stützpunkten, ohne vorherige Vereinigung
+        site_polygon = shapely.multipoints(shapely.get_coordinates(zone_gdf.geometry.to_numpy())).convex_hull
         return gpd.GeoDataFrame(geometry=[site_polygon], crs=zone_gdf.crs)
     except Exception as e:
         print(f"Fehler beim Erstellen des Site-Polygons: {str(e)}")
@@ -117,20 +117,27 @@ def create_site_polygon(zone_path):
 def check_required_files(geometry_path, properties_path):
     """Überprüft ob alle notwendigen Dateien existieren"""
     required_files = {
-        'geometry': [
-            geometry_path / 'zone.shp',
-            geometry_path / 'site.shp'
-        ],
-        'properties': [
-            properties_path / 'typology.dbf'
-        ]
+        geometry_path: ['zone.shp', 'site.shp'],
+        properties_path: ['typology.dbf']
     }
     
+    # Ein Verzeichnislisting pro Ordner statt eines stat()-Aufrufs pro Datei.
+    # normcase beidseitig (Windows), nicht gelistete Namen zusätzlich per exists() prüfen,
+    # damit z.B. Zone.shp auch auf anderen Dateisystemen ohne Groß-/Kleinschreibung gefunden wird
     missing_files = []
-    for category, files in required_files.items():
-        for file_path in files:
-            if not file_path.exists():
-                missing_files.append(file_path)
+    for directory, names in required_files.items():
+        try:
+            with os.scandir(directory) as entries:
+                existing = {os.path.normcase(entry.name) for entry in entries}
+        except (FileNotFoundError, NotADirectoryError):
+            existing = None
+        if existing is None:
+            missing_files.extend(directory / name for name in names)
+            continue
+        missing_files.extend(
+            directory / name for name in names
+            if os.path.normcase(name) not in existing and not (directory / name).exists()
+        )
     
     if missing_files:
         print("\nFehlende Dateien:")
@@ -149,8 +156,7 @@ def main():
 
         # Lade Konfiguration
         config_path = project_root / "cfg" / "cea_config.yml"
-        with open(config_path) as f:
-            config = yaml.safe_load(f)
+        config = load_yaml(config_path)
         
         # Erstelle Projekt-Verzeichnisstruktur
         project_path = project_root / 'projects' / project / scenario
@@ -213,8 +219,6 @@ def main():
         print(f"- Technologie: {technology_path}")
         
         # Verwende das zone.shp für das site polygon
-        site_polygon = create_site_polygon(geometry_path / 'zone.shp')
-        
         print("\n2. Erstelle Site Polygon...")
         site_polygon = create_site_polygon(geometry_path / 'zone.shp')
         save_site_polygon(site_polygon, geometry_path / 'site.shp')
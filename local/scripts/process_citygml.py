@@ -1,8 +1,8 @@
 import sys
-import yaml
 import logging
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import geopandas as gpd
 
 # Füge Projekt-Root zum Python-Path hinzu
@@ -12,6 +12,7 @@ if str(project_root) not in sys.path:
 
 # Importiere Module
 from utils.setup_project_paths import setup_project_paths
+from utils.data_processing.config_loader import load_yaml
 from utils.data_sources.fetch_citygml_buildings import fetch_citygml_buildings, CityGMLBuildingProcessor
 from utils.data_sources.fetch_wfs_data import ViennaWFS
 from utils.data_sources.fetch_osm_buildings import fetch_osm_buildings
@@ -21,13 +22,17 @@ from utils.data_processing.cea_building_processor import CEABuildingProcessor
 
 def setup_logger():
     """Initialisiert einen Logger"""
+    logger = logging.getLogger('CityGMLProcessor')
+    if logger.handlers:
+        # Bereits eingerichtet: keine doppelten Handler und keine weitere Logdatei
+        return logger
+
     log_dir = project_root / "logs"
     log_dir.mkdir(exist_ok=True, parents=True)
 
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     log_file = log_dir / f'citygml_processing_{timestamp}.log'
 
-    logger = logging.getLogger('CityGMLProcessor')
     logger.setLevel(logging.DEBUG)
 
     file_handler = logging.FileHandler(log_file, encoding='utf-8')
@@ -46,8 +51,7 @@ def setup_logger():
 def load_config(config_path: Path, logger):
     """Lädt YAML-Konfigurationsdateien"""
     try:
-        with open(config_path, 'r', encoding='utf-8') as file:
-            config = yaml.safe_load(file)
+        config = load_yaml(config_path)
 
         logger.info(f"✅ Konfiguration geladen: {config_path.name}")
         return config
@@ -100,29 +104,36 @@ def process_citygml(citygml_path: Path, project_name: str, scenario_name: str, l
             logger.info(site_polygon)
             return None
 
-        # 6. Hole OSM Gebäude
-        osm_buildings = fetch_osm_buildings(
-            site_polygon,
-            distance=project_config['geometry']['surrounding_buildings_distance']
-        )
-        logger.info(f"✅ OSM Gebäude geladen: {len(osm_buildings)}")
-
-        # 7. Hole OSM Straßen
+        # 6./7. Hole OSM Gebäude und Straßen parallel (unabhängige Netzwerkabfragen)
         street_types = osm_config.get('streets', [])
         logger.info(f"📍 Hole OSM-Straßen für Kategorien: {street_types}")
-        osm_streets = fetch_osm_streets(site_polygon, street_types=street_types)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            buildings_future = executor.submit(
+                fetch_osm_buildings,
+                site_polygon,
+                distance=project_config['geometry']['surrounding_buildings_distance']
+            )
+            streets_future = executor.submit(fetch_osm_streets, site_polygon, street_types=street_types)
+
+            osm_buildings = buildings_future.result()
+            osm_streets = streets_future.result()
+
+        logger.info(f"✅ OSM Gebäude geladen: {len(osm_buildings)}")
         logger.info(f"✅ OSM Straßen geladen: {len(osm_streets)}")
 
         # 8. Speichere Ergebnisse
-        cea_processor.save_zone_shapefile(buildings_gdf, project_paths)
-        cea_processor.save_typology_shapefile(buildings_gdf, project_paths)
+        cea_processor.save_zone_shapefile(buildings_gdf, project_paths['scenario'])
+
+        osm_buildings.to_file(project_paths['geometry'] / "surroundings.shp", driver="ESRI Shapefile", engine="pyogrio")
+        site_polygon.to_file(project_paths['geometry'] / "site.shp", driver="ESRI Shapefile", engine="pyogrio")
+        osm_streets.to_file(project_paths['networks'] / "streets.shp", driver="ESRI Shapefile", engine="pyogrio")
 
-        osm_buildings.to_file(project_paths['geometry'] / "surroundings.shp", driver="ESRI Shapefile")
-        site_polygon.to_file(project_paths['geometry'] / "site.shp", driver="ESRI Shapefile")
-        osm_streets.to_file(project_paths['networks'] / "streets.shp", driver="ESRI Shapefile")
+        # CEA liest inputs/building-properties/typology.dbf: dort die Typologie (mit STANDARD)
+        # ablegen, nicht die Rohattribute aus WFS/CityGML
+        cea_processor.save_typology_shapefile(cea_processor.create_typology(buildings_gdf), project_paths['scenario'])
 
         # 9. Szenarien für Gebäudetypologie
-        cea_processor.create_scenarios(buildings_gdf, project_paths['building-properties'])
+        cea_processor.create_scenarios(buildings_gdf, project_paths['properties'])
 
         logger.info(f"✅ Alle Daten erfolgreich gespeichert in: projects/{project_name}/{scenario_name}/")
 
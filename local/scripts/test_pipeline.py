@@ -15,13 +15,17 @@ from utils.data_processing.cea_building_processor import CEABuildingProcessor
 
 def setup_logger():
     """Test-Logger Setup"""
+    logger = logging.getLogger('PipelineTest')
+    if logger.handlers:
+        # Bereits eingerichtet: keine doppelten Handler und keine weitere Logdatei
+        return logger
+
     log_dir = project_root / "logs"
     log_dir.mkdir(exist_ok=True, parents=True)
     
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     log_file = log_dir / f'pipeline_test_{timestamp}.log'
     
-    logger = logging.getLogger('PipelineTest')
     logger.setLevel(logging.DEBUG)
     
     # File Handler
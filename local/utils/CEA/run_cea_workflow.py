@@ -2,6 +2,12 @@ import yaml
 import subprocess
 from pathlib import Path
 import os
+import sys
+
+# Füge Projekt-Root zum Python-Path hinzu
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from utils.data_processing.config_loader import load_yaml
 
 def run_cea_workflow(scenario_path):
     """
@@ -20,11 +26,8 @@ def run_cea_workflow(scenario_path):
         print(f"Verwende Workflow: {cea_workflow_path}")
         
         # Lade Konfigurationen
-        with open(cea_config_path, 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f)
-        
-        with open(cea_workflow_path, 'r', encoding='utf-8') as f:
-            workflow = yaml.safe_load(f)
+        config = load_yaml(cea_config_path)
+        workflow = load_yaml(cea_workflow_path)
         
         # Basis-Pfade holen (oder per .get prüfen)
         weather_base = config['paths']['weather_base']
@@ -1,6 +1,12 @@
 import os
+import bisect
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import numpy as np
+import pandas as pd
 import geopandas as gpd
+import pyogrio
 
 # Füge Projekt-Root zum Python-Path hinzu wenn direkt ausgeführt
 # if __name__ == "__main__":
@@ -11,13 +17,39 @@ import geopandas as gpd
 # else:
 #     from .base_building_processor import BaseBuildingProcessor
 
+
+# Suffixe nach Baujahresklasse (alt -> neu), siehe determine_standard
+_STANDARD_SUFFIXES = np.array(['_A', '_B', '_C', '_D'])
+_STANDARD_YEAR_BINS = np.array([1960, 1980, 2000])
+# Als Listen für den skalaren Pfad (bisect), ohne NumPy-Overhead pro Aufruf
+_STANDARD_SUFFIXES_LIST = _STANDARD_SUFFIXES.tolist()
+_STANDARD_YEAR_BINS_LIST = _STANDARD_YEAR_BINS.tolist()
+
+
+def _write_vector(frame, path, driver='ESRI Shapefile') -> None:
+    """Schreibt einen (Geo)DataFrame gesammelt über pyogrio/GDAL"""
+    pyogrio.write_dataframe(frame, str(path), driver=driver)
+
     
 class CEABuildingProcessor:
     """Basis-Klasse für CEA-spezifische Verarbeitung"""
 
+    # Pflichtfelder für die CEA-Typologie
+    REQUIRED_FIELDS = ('Name', 'YEAR', 'STANDARD', 'USE1')
+
+    # Default-Werte für fehlende Felder der Typologie
+    TYPOLOGY_DEFAULTS = {
+        'Name': '',
+        'YEAR': 2000,
+        'USE1_R': 1.0,
+        'USE2': 'NONE',
+        'USE2_R': 0.0,
+    }
+
     def __init__(self, config, cea_config):
         self.config = config
         self.cea_config = cea_config
+        self.logger = logging.getLogger(self.__class__.__name__)
 
     def setup_project_structure(self, project_name, scenario_name, project_root):
         """Erstellt die Verzeichnisstruktur für das Projekt"""
@@ -30,31 +62,53 @@ class CEABuildingProcessor:
             "networks": scenario_dir / "inputs/networks"
         }
 
+        # Nur das Szenario-Verzeichnis braucht parents=True, darunter genügt je ein mkdir
+        scenario_dir.mkdir(parents=True, exist_ok=True)
+        (scenario_dir / "inputs").mkdir(exist_ok=True)
+
         for key, path in paths.items():
-            path.mkdir(parents=True, exist_ok=True)
+            if path != scenario_dir:
+                path.mkdir(exist_ok=True)
             print(f"📁 Verzeichnis erstellt/geprüft: {path}")
 
         return paths
 
     def save_typology_shapefile(self, typology_df, scenario_dir):
-        """Speichert die Gebäudetypologie als Shapefile"""
+        """Speichert die Gebäudetypologie als typology.dbf
+
+        CEA liest die Typologie als reine DBF-Tabelle aus inputs/building-properties,
+        daher wird keine Shapefile-Geometrie geschrieben.
+        """
         try:
-            output_path = scenario_dir / "inputs/properties/typology.shp"
-            print(f"\nSpeichere Typologie-Shapefile: {output_path}")
-            
-            # Erstelle ein GeoDataFrame mit einer Dummy-Geometrie (Falls keine Geometrie vorhanden)
-            typology_gdf = gpd.GeoDataFrame(
-                typology_df,
-                geometry=gpd.points_from_xy([0] * len(typology_df), [0] * len(typology_df)),
-                crs="EPSG:2056"
-            )
+            self.save_as_dbf(typology_df, scenario_dir / "inputs/building-properties")
+
+        except Exception:
+            # Fehler wurde bereits von save_as_dbf ausgegeben
+            pass
+
+    def save_as_dbf(self, typology_df, output_dir, verbose=True):
+        """Speichert die Gebäudetypologie als typology.dbf
+
+        Args:
+            verbose: Fortschritt ausgeben; False beim parallelen Schreiben, dann meldet der Aufrufer
+        """
+        try:
+            output_dir = Path(output_dir)
+            output_dir.mkdir(parents=True, exist_ok=True)
+            output_path = output_dir / "typology.dbf"
+            if verbose:
+                print(f"\nSpeichere Typologie-DBF: {output_path}")
+
+            # Ohne Geometrie schreibt der Shapefile-Treiber nur die DBF-Datei
+            attributes = pd.DataFrame(typology_df.drop(columns='geometry', errors='ignore'))
+            _write_vector(attributes, output_path)
+            if verbose:
+                print("✅ Typologie-DBF erfolgreich gespeichert")
 
-            # Speichere als Shapefile
-            typology_gdf.to_file(output_path, driver='ESRI Shapefile')
-            print("✅ Typologie-Shapefile erfolgreich gespeichert")
-            
         except Exception as e:
-            print(f"❌ Fehler beim Speichern der Typologie: {str(e)}")
+            if verbose:
+                print(f"❌ Fehler beim Speichern der Typologie-DBF: {str(e)}")
+            raise
 
     def save_zone_shapefile(self, buildings_gdf, scenario_dir):
         """Speichert die Zone als Shapefile"""
@@ -67,7 +121,7 @@ class CEABuildingProcessor:
                 raise TypeError("buildings_gdf muss ein GeoDataFrame sein")
 
             # Speichere als Shapefile
-            buildings_gdf.to_file(output_path, driver='ESRI Shapefile')
+            _write_vector(buildings_gdf, output_path)
             print("✅ Zone-Shapefile erfolgreich gespeichert")
             
         except Exception as e:
@@ -77,15 +131,11 @@ class CEABuildingProcessor:
     def determine_standard(self, year, building_type, renovation_status="Nicht saniert"):
         """Berechnet den Gebäudestandard"""
         try:
-            # Default Suffix basierend auf Baujahr
-            suffix = "_A"  # Default für alte Gebäude
-            
-            if year >= 2000:
-                suffix = "_D"  # Neubau
-            elif year >= 1980:
-                suffix = "_C"  # Mittleres Alter
-            elif year >= 1960:
-                suffix = "_B"  # Älteres Gebäude
+            # Suffix nach Baujahr: _A (< 1960), _B (ab 1960), _C (ab 1980), _D (ab 2000)
+            # Binäre Suche über dieselben Grenzen wie determine_standards, NaN bleibt bei _A
+            suffix = _STANDARD_SUFFIXES_LIST[
+                bisect.bisect_right(_STANDARD_YEAR_BINS_LIST, year) if year == year else 0
+            ]
             
             standard = f"{building_type}{suffix}"
             
@@ -99,23 +149,75 @@ class CEABuildingProcessor:
             print(f"Fehler bei Standardbestimmung: {str(e)}")
             return "UNKNOWN"
 
+    def determine_standards(self, years, building_types, renovation_status=None):
+        """Berechnet den Gebäudestandard für ganze Spalten (vektorisiert)
+
+        Liefert dieselben Werte wie determine_standard pro Zeile.
+        """
+        # Nur Zahlen sind gültige Baujahre; Strings, None oder pd.NA lassen
+        # determine_standard scheitern und ergeben dort UNKNOWN
+        if isinstance(years.dtype, np.dtype) and years.dtype.kind in 'biuf':
+            year = years.to_numpy(dtype=float)
+            unknown = np.zeros(len(year), dtype=bool)
+        else:
+            unknown = ~years.map(lambda value: isinstance(value, (int, float, np.number))).to_numpy(dtype=bool)
+            year = pd.to_numeric(years.where(~unknown), errors='coerce').to_numpy(dtype=float)
+
+        # Gleiche Baujahres-Grenzen wie determine_standard, Index in _STANDARD_SUFFIXES
+        # NaN-Baujahr vergleicht nie größer und bleibt wie dort bei _A
+        suffix_idx = np.where(np.isnan(year), 0, np.digitize(year, _STANDARD_YEAR_BINS))
+
+        # Wenige Gebäudetypen: Lookup-Tabelle Typ x Suffix statt String-Verkettung pro Zeile
+        # str() pro Element nur, wenn die Spalte nicht schon vollständig aus Strings besteht;
+        # wie im f-String von determine_standard wird ein fehlender Typ zu 'None' bzw. 'nan'
+        if not (pd.api.types.is_string_dtype(building_types) and building_types.notna().all()):
+            building_types = building_types.map(str)
+        types = building_types.astype('category')
+        categories = types.cat.categories.to_numpy().astype(str)
+        lookup = np.char.add(categories[:, None], _STANDARD_SUFFIXES[None, :])
+        # Fehlender Gebäudetyp hat Code -1 und landet damit in der letzten Zeile
+        lookup = np.vstack([lookup, np.full((1, len(_STANDARD_SUFFIXES)), "UNKNOWN")])
+
+        standards = pd.Series(
+            lookup[types.cat.codes.to_numpy(), suffix_idx],
+            index=building_types.index,
+            dtype=object
+        )
+
+        # Renovierungsstatus wie in determine_standard, jeder andere Wert (auch fehlend) ergibt _NR
+        if renovation_status is not None:
+            renovated = renovation_status.to_numpy(dtype=object) != "Nicht saniert"
+            standards = standards.where(~renovated, standards + "_NR")
+
+        return standards.where(~unknown, "UNKNOWN")
+
     def create_typology(self, buildings_df):
         """Erstellt CEA-konforme Gebäudetypologie"""
         try:
-            typology = buildings_df.copy()
-            
-            # Standardisiere Spalten
-            typology['Name'] = typology['Name'].fillna('')
-            typology['YEAR'] = typology['YEAR'].fillna(2000)
-            typology['STANDARD'] = typology.apply(
-                lambda x: self.determine_standard(x['YEAR'], x['BLDG_TYPE']), 
-                axis=1
+            # Standardisiere Spalten: alle Defaults in einem fillna-Aufruf
+            present = [col for col in self.TYPOLOGY_DEFAULTS if col in buildings_df.columns]
+            filled = buildings_df[present].fillna(self.TYPOLOGY_DEFAULTS)
+
+            # Fehlende Spalten bleiben Skalare und werden beim Aufbau der Tabelle verteilt
+            columns = {**self.TYPOLOGY_DEFAULTS, **filled.to_dict('series')}
+            year = filled['YEAR'] if 'YEAR' in filled else pd.Series(columns['YEAR'], index=buildings_df.index)
+
+            # Baujahr als int32 (DBF-Feld N(4,0)), sofern alle Werte numerisch sind;
+            # vorher runden, damit STANDARD aus demselben Jahr wie das gespeicherte folgt
+            numeric_year = pd.to_numeric(year, errors='coerce')
+            if numeric_year.notna().all():
+                year = columns['YEAR'] = numeric_year.round().astype(np.int32)
+            columns['STANDARD'] = self.determine_standards(
+                year,
+                buildings_df['BLDG_TYPE'],
+                buildings_df.get('renovation_status')
             )
-            
-            # Setze Default-Werte für fehlende Felder
-            typology['USE1_R'] = typology['USE1_R'].fillna(1.0)
-            typology['USE2'] = typology['USE2'].fillna('NONE')
-            typology['USE2_R'] = typology['USE2_R'].fillna(0.0)
+
+            # Typologie ist eine reine Attributtabelle (DBF): Geometrie nicht mitkopieren,
+            # übrige Spalten und neue Werte in einem Schritt zusammenbauen
+            geometry_col = buildings_df.geometry.name if isinstance(buildings_df, gpd.GeoDataFrame) else None
+            attributes = {col: buildings_df[col] for col in buildings_df.columns if col != geometry_col}
+            typology = pd.DataFrame({**attributes, **columns}, index=buildings_df.index)
             
             return typology
             
@@ -128,21 +230,31 @@ class CEABuildingProcessor:
         try:
             # Basis-Szenario
             base_scenario = self.create_typology(buildings_df)
-            self.save_as_dbf(base_scenario, scenario_path / "baseline")
             
-            # 2030 Szenario
-            scenario_2030 = base_scenario.copy()
-            scenario_2030['STANDARD'] = scenario_2030['STANDARD'].apply(
-                lambda x: x + "_R" if not x.endswith("_R") else x
-            )
-            self.save_as_dbf(scenario_2030, scenario_path / "2030")
+            # 2030 Szenario (flache Kopie, nur STANDARD wird ersetzt)
+            scenario_2030 = base_scenario.copy(deep=False)
+            standard = scenario_2030['STANDARD']
+            scenario_2030['STANDARD'] = standard.where(standard.str.endswith("_R"), standard + "_R")
             
             # 2050 Szenario
-            scenario_2050 = scenario_2030.copy()
-            scenario_2050['STANDARD'] = scenario_2050['STANDARD'].apply(
-                lambda x: x.replace("_R", "_HR")
-            )
-            self.save_as_dbf(scenario_2050, scenario_path / "2050")
+            scenario_2050 = scenario_2030.copy(deep=False)
+            scenario_2050['STANDARD'] = scenario_2030['STANDARD'].str.replace("_R", "_HR", regex=False)
+            
+            # Die drei DBF-Dateien sind unabhängig, GDAL gibt beim Schreiben den GIL frei
+            scenarios = {
+                "baseline": base_scenario,
+                "2030": scenario_2030,
+                "2050": scenario_2050,
+            }
+            # Ausgabe nur aus dem aufrufenden Thread, sonst vermischen sich die Meldungen
+            with ThreadPoolExecutor(max_workers=len(scenarios)) as executor:
+                futures = {
+                    name: executor.submit(self.save_as_dbf, scenario, scenario_path / name, verbose=False)
+                    for name, scenario in scenarios.items()
+                }
+                for name, future in futures.items():
+                    future.result()
+                    print(f"✅ Typologie-DBF für Szenario {name} gespeichert: {scenario_path / name / 'typology.dbf'}")
             
         except Exception as e:
             print(f"Fehler bei Szenarienerstellung: {str(e)}")
@@ -150,11 +262,9 @@ class CEABuildingProcessor:
 
     def validate_building_data(self, building_data: dict) -> bool:
         """Validiert die Gebäudedaten"""
-        required_fields = ['Name', 'YEAR', 'STANDARD', 'USE1']
-        
-        for field in required_fields:
+        for field in self.REQUIRED_FIELDS:
             if field not in building_data:
-                self.logger.warning(f"Fehlendes Pflichtfeld: {field}")
+                self.logger.warning("Fehlendes Pflichtfeld: %s", field)
                 return False
             
         return True
@@ -1,20 +1,65 @@
-import yaml
+import copy
+from collections import OrderedDict
 from pathlib import Path
 
+import yaml
+
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+# Cache für geparste YAML-Dateien, Schlüssel: (Pfad, mtime_ns, Größe)
+_YAML_CACHE: "OrderedDict[tuple, dict]" = OrderedDict()
+_YAML_CACHE_MAX = 100
+
+
+def load_yaml(config_path):
+    """Lädt eine YAML-Datei mit Cache
+
+    Bei unveränderter Datei (gleiche mtime und Größe) wird das bereits
+    geparste Ergebnis verwendet. Zurückgegeben wird immer eine Kopie, damit
+    Änderungen durch Aufrufer den Cache nicht verfälschen.
+
+    Args:
+        config_path: Pfad zur YAML-Datei
+    """
+    config_path = Path(config_path).resolve()
+    stat = config_path.stat()
+    key = (str(config_path), stat.st_mtime_ns, stat.st_size)
+
+    if key in _YAML_CACHE:
+        _YAML_CACHE.move_to_end(key)
+        return copy.deepcopy(_YAML_CACHE[key])
+
+    # Datei in einem Zug lesen, libyaml parst den String schneller als einen Stream
+    config = yaml.load(config_path.read_bytes().decode('utf-8'), Loader=_YamlLoader)
+
+    _YAML_CACHE[key] = config
+    if len(_YAML_CACHE) > _YAML_CACHE_MAX:
+        _YAML_CACHE.popitem(last=False)
+
+    return copy.deepcopy(config)
+
+
+def clear_yaml_cache():
+    """Leert den Cache von load_yaml, z.B. nach Änderungen ohne neue mtime"""
+    _YAML_CACHE.clear()
+
+
 def load_config(config_path):
     """Lädt die Konfiguration aus einer YAML-Datei
-    
+
     Args:
         config_path: Pfad zur Konfigurationsdatei
     """
     try:
         print(f"Lade Konfiguration: {config_path.name}")
-        
-        with open(config_path, 'r', encoding='utf-8') as file:
-            config = yaml.safe_load(file)
-            
+
+        config = load_yaml(config_path)
+
         return config
-        
+
     except Exception as e:
         print(f"❌ Fehler beim Laden der Konfiguration: {str(e)}")
-        return None 
\ No newline at end of file
+        return None
@@ -1,40 +1,56 @@
 import geopandas as gpd
+import shapely
 from shapely.geometry import Polygon, box
-from shapely.ops import unary_union
 import numpy as np
+import math
 from pathlib import Path
-import yaml
 import sys
 
-def create_site_polygon(buildings_gdf: gpd.GeoDataFrame, buffer_distance: float = 3) -> gpd.GeoDataFrame:
+# Füge Projekt-Root zum Python-Path hinzu
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from utils.data_processing.config_loader import load_yaml
+
+def _quad_segs(buffer_distance: float, tolerance: float) -> int:
+    """Kleinste Segmentanzahl pro Viertelkreis, bei der die Bogenabweichung unter tolerance bleibt"""
+    if buffer_distance <= tolerance:
+        return 1
+    return max(1, math.ceil(math.pi / (4 * math.acos(1 - tolerance / buffer_distance))))
+
+def create_site_polygon(buildings_gdf: gpd.GeoDataFrame, buffer_distance: float = 3, use_envelope: bool = False) -> gpd.GeoDataFrame:
     """
     Erstellt ein einzelnes Polygon, das alle Gebäude umschließt mit definiertem Abstand.
     
     Args:
         buildings_gdf: GeoDataFrame mit Gebäudegeometrien
         buffer_distance: Abstand in Metern (default 3m)
+        use_envelope: Bounding Box statt konvexer Hülle verwenden (schneller, gröber)
 
     Returns:
         site_gdf: GeoDataFrame mit einem einzigen Polygon für den Standort
     """
-    if 'geometry' not in buildings_gdf.columns or buildings_gdf.geometry.isnull().all():
+    # Fehlende Geometrien direkt auf dem Geometrie-Array prüfen, ohne boolesche Series
+    if 'geometry' not in buildings_gdf.columns or shapely.is_missing(buildings_gdf.geometry.to_numpy()).all():
         print("⚠️ Warnung: buildings_gdf enthält keine gültigen Geometrien, Standortpolygon wird aus Bounding Box erstellt.")
         site_polygon = box(*buildings_gdf.total_bounds)  # Falls keine gültigen Gebäude vorhanden sind
     else:
-        print("📐 Erstelle äußere Hülle um alle Gebäude")
-        all_buildings = unary_union(buildings_gdf.geometry)
+        if use_envelope:
+            print("📐 Erstelle Bounding Box um alle Gebäude")
+            hull = box(*buildings_gdf.total_bounds)
+        else:
+            print("📐 Erstelle äußere Hülle um alle Gebäude")
+            # Die konvexe Hülle hängt nur von den Stützpunkten ab, eine Vereinigung ist nicht nötig
+            coords = shapely.get_coordinates(buildings_gdf.geometry.to_numpy())
+            hull = shapely.multipoints(coords).convex_hull
 
         print(f"🔲 Erstelle Buffer mit Abstand {buffer_distance}m")
-        site_polygon = all_buildings.convex_hull.buffer(buffer_distance)
-
-        # Optional: Vereinfache das Polygon leicht für eine glattere Form
-        site_polygon = site_polygon.simplify(tolerance=0.5)
+        # Bögen direkt so grob erzeugen, wie es die Vereinfachung (0.5m) erlauben würde
+        site_polygon = hull.buffer(buffer_distance, quad_segs=_quad_segs(buffer_distance, tolerance=0.5))
 
     # Erstelle GeoDataFrame mit dem Site-Polygon
     site_gdf = gpd.GeoDataFrame(
-        {'Name': ['Site'],
-         'geometry': [site_polygon]},
-        crs=buildings_gdf.crs
+        {'Name': ['Site']},
+        geometry=gpd.GeoSeries([site_polygon], crs=buildings_gdf.crs)
     )
 
     # Debug-Ausgabe der Polygon-Eigenschaften
@@ -47,7 +63,7 @@ def create_site_polygon(buildings_gdf: gpd.GeoDataFrame, buffer_distance: float
 def save_site_polygon(site_gdf, output_path):
     """Speichert das Site-Polygon als Shapefile"""
     print(f"Speichere Site-Polygon nach: {output_path}")
-    site_gdf.to_file(output_path, driver='ESRI Shapefile')
+    site_gdf.to_file(output_path, driver='ESRI Shapefile', engine='pyogrio')
     print("Site-Polygon erfolgreich gespeichert")
 
 def load_config():
@@ -57,8 +73,7 @@ def load_config():
         config_path = Path(__file__).resolve().parent.parent.parent / 'cfg' / 'project_config.yml'
         print(f"Lade Konfiguration: {config_path}")
         
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        config = load_yaml(config_path)
             
         return config.get('surroundings', {})
         
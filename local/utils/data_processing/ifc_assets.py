@@ -1,146 +1,159 @@
 import ifcopenshell
 import ifcopenshell.geom 
 import numpy as np
-import random
 import time
 
-ifc_file = ifcopenshell.open("data/ifc/Model.ifc")
-
-buildings = ifc_file.by_type("IfcBuilding")
-
-for building in buildings:
-    print(f"Gebäude: {building.Name}, GUID: {building.GlobalId}")
-
-storeys = ifc_file.by_type("IfcBuildingStorey")
-
-for storey in storeys:
-    print(f"Stockwerk: {storey.Name}, Höhe: {storey.Elevation}")
-
-spaces = ifc_file.by_type("IfcSpace")
-
-for space in spaces:
-    for rel in space.IsDefinedBy:
-        if rel.is_a("IfcRelDefinesByProperties"):
-            props = rel.RelatingPropertyDefinition
-            if props.is_a("IfcPropertySet"):
-                for p in props.HasProperties:
-                    if p.Name == "NetVolume":
-                        print(f"Raum: {space.Name}, Volumen: {p.NominalValue.wrappedValue} m³")
-
-# Wände abrufen und mit zufälligen U-Werten versehen
-walls = ifc_file.by_type("IfcWall")
-
-# Fenster nach Himmelsrichtung analysieren
-windows = ifc_file.by_type("IfcWindow")
-window_types = ifc_file.by_type("IfcWindowType")
-print("\nFensterflächenanalyse:")
-print("=====================")
-
-for window in windows:
-    width = None
-    height = None
-    orientation = "Unbestimmt"
-    
-    # Werte direkt aus dem Fenster oder seinem Typ auslesen
-    for rel in window.IsDefinedBy:
-        if rel.is_a("IfcRelDefinesByProperties"):
-            props = rel.RelatingPropertyDefinition
-            if props.is_a("IfcPropertySet"):
-                if props.Name == "EPset_Opening":
-                    for prop in props.HasProperties:
-                        if prop.Name == "OverallHeight":
-                            height = prop.NominalValue.wrappedValue
-                        elif prop.Name == "OverallWidth":
-                            width = prop.NominalValue.wrappedValue
-                elif props.Name == "Pset_WindowCommon":
-                    for prop in props.HasProperties:
-                        if prop.Name == "Orientation":
-                            orientation = prop.NominalValue.wrappedValue
-
-    # Falls keine Werte gefunden wurden, im WindowType nachschauen
-    if not width or not height:
-        window_type = window.IsTypedBy[0].RelatingType if window.IsTypedBy else None
-        if window_type:
-            for rel in window_type.HasPropertySets:
-                if rel.Name == "EPset_Opening":
-                    for prop in rel.HasProperties:
-                        if prop.Name == "OverallHeight":
-                            height = prop.NominalValue.wrappedValue
-                        elif prop.Name == "OverallWidth":
-                            width = prop.NominalValue.wrappedValue
-
-    # Wenn immer noch keine Werte gefunden wurden, direkte Attribute prüfen
-    if not width:
-        width = getattr(window, 'OverallWidth', None)
-    if not height:
-        height = getattr(window, 'OverallHeight', None)
-
-    if width and height:
-        area = round(width * height, 2)
-        print(f"Fenster {window.GlobalId}:")
-        print(f"  Name: {window.Name if window.Name else 'Unbenannt'}")
-        print(f"  Orientierung: {orientation}")
-        print(f"  Breite: {width} m")
-        print(f"  Höhe: {height} m")
-        print(f"  Fläche: {area} m²")
-        print("  ---")
-
-# Gesamtstatistik
-total_window_area = 0
-window_count = 0
-windows_with_dimensions = 0
-
-for window in windows:
-    width = None
-    height = None
-    
-    # Gleiche Logik wie oben für die Dimensionssuche...
-    for rel in window.IsDefinedBy:
-        if rel.is_a("IfcRelDefinesByProperties"):
-            props = rel.RelatingPropertyDefinition
-            if props.is_a("IfcPropertySet") and props.Name == "EPset_Opening":
-                width = next((prop.NominalValue.wrappedValue for prop in props.HasProperties if prop.Name == "OverallWidth"), None)
-                height = next((prop.NominalValue.wrappedValue for prop in props.HasProperties if prop.Name == "OverallHeight"), None)
-    
-    if not width or not height:
-        window_type = window.IsTypedBy[0].RelatingType if window.IsTypedBy else None
-        if window_type:
-            for rel in window_type.HasPropertySets:
-                if rel.Name == "EPset_Opening":
-                    width = next((prop.NominalValue.wrappedValue for prop in rel.HasProperties if prop.Name == "OverallWidth"), None)
-                    height = next((prop.NominalValue.wrappedValue for prop in rel.HasProperties if prop.Name == "OverallHeight"), None)
-
-    if width and height:
-        total_window_area += width * height
-        windows_with_dimensions += 1
-    window_count += 1
-
-print("\nGesamtstatistik:")
-print(f"Gesamtanzahl Fenster: {window_count}")
-print(f"Fenster mit Maßangaben: {windows_with_dimensions}")
-print(f"Gesamtfensterfläche: {round(total_window_area, 2)} m²")
-print(f"Durchschnittliche Fensterfläche: {round(total_window_area/windows_with_dimensions if windows_with_dimensions > 0 else 0, 2)} m²")
-
-windows = ifc_file.by_type("IfcWindow")
-print("\nProperty Set Diagnose:")
-print("=====================")
-
-# Erstes Fenster als Beispiel nehmen
-if windows:
-    window = windows[0]
-    print(f"Gefundene Fenster: {len(windows)}")
-    print("\nVerfügbare Property Sets für erstes Fenster:")
-    
-    for rel in window.IsDefinedBy:
-        if rel.is_a("IfcRelDefinesByProperties"):
-            props = rel.RelatingPropertyDefinition
-            if props.is_a("IfcPropertySet"):
-                print(f"\nProperty Set Name: {props.Name}")
-                print("Properties:")
+# Property Sets mit Fenstermaßen bzw. Orientierung
+_WINDOW_PSETS = frozenset({"EPset_Opening", "Pset_WindowCommon"})
+
+# Pset_RoofCommon: (Property, IFC-Typ) in der Spaltenreihenfolge der Zufallswerte
+_ROOF_PROPERTIES = (
+    ("ThermalTransmittance", "IfcThermalTransmittanceMeasure"),
+    ("SolarAbsorption", "IfcPositiveRatioMeasure"),
+    ("Emissivity", "IfcPositiveRatioMeasure"),
+    ("Reflectance", "IfcPositiveRatioMeasure"),
+)
+
+
+def build_window_dim_index(ifc_file):
+    """Liest Breite, Höhe und Orientierung aller Fenster in einem Durchgang
+
+    Reihenfolge der Quellen: Property Sets am Fenster, EPset_Opening des
+    Fenstertyps, direkte Attribute OverallWidth/OverallHeight.
+
+    Returns:
+        Dict Entity-ID (window.id()) -> (Breite, Höhe, Orientierung);
+        die GlobalId ist nicht immer eindeutig oder gesetzt
+    """
+    dims = {}
+    for window in ifc_file.by_type("IfcWindow"):
+        width = None
+        height = None
+        orientation = "Unbestimmt"
+
+        # Werte direkt aus dem Fenster auslesen
+        for rel in window.IsDefinedBy:
+            if not rel.is_a("IfcRelDefinesByProperties"):
+                continue
+            props = getattr(rel, "RelatingPropertyDefinition", None)
+            if props is None or not props.is_a("IfcPropertySet") or props.Name not in _WINDOW_PSETS:
+                continue
+            if props.Name == "EPset_Opening":
+                for prop in props.HasProperties:
+                    if prop.Name == "OverallHeight":
+                        height = prop.NominalValue.wrappedValue
+                    elif prop.Name == "OverallWidth":
+                        width = prop.NominalValue.wrappedValue
+            else:
                 for prop in props.HasProperties:
-                    print(f"  - {prop.Name}: {prop.NominalValue.wrappedValue if hasattr(prop, 'NominalValue') else 'N/A'}")
-else:
-    print("Keine Fenster in der IFC-Datei gefunden!")
+                    if prop.Name == "Orientation":
+                        orientation = prop.NominalValue.wrappedValue
+
+        # Fenstertyp nur auflösen, wenn Maße fehlen
+        if not width or not height:
+            window_type = window.IsTypedBy[0].RelatingType if window.IsTypedBy else None
+            if window_type:
+                for rel in window_type.HasPropertySets or ():
+                    if rel.Name == "EPset_Opening":
+                        for prop in rel.HasProperties:
+                            if prop.Name == "OverallHeight":
+                                height = prop.NominalValue.wrappedValue
+                            elif prop.Name == "OverallWidth":
+                                width = prop.NominalValue.wrappedValue
+
+        # Wenn immer noch keine Werte gefunden wurden, direkte Attribute prüfen
+        if not width:
+            width = getattr(window, 'OverallWidth', None)
+        if not height:
+            height = getattr(window, 'OverallHeight', None)
+
+        dims[window.id()] = (width, height, orientation)
+    return dims
+
+
+def print_model_report(ifc_file):
+    """Gibt Gebäude, Stockwerke, Räume und die Fensterflächenanalyse aus"""
+    buildings = ifc_file.by_type("IfcBuilding")
+
+    for building in buildings:
+        print(f"Gebäude: {building.Name}, GUID: {building.GlobalId}")
+
+    storeys = ifc_file.by_type("IfcBuildingStorey")
+
+    for storey in storeys:
+        print(f"Stockwerk: {storey.Name}, Höhe: {storey.Elevation}")
+
+    spaces = ifc_file.by_type("IfcSpace")
+
+    for space in spaces:
+        for rel in space.IsDefinedBy:
+            if rel.is_a("IfcRelDefinesByProperties"):
+                props = rel.RelatingPropertyDefinition
+                if props.is_a("IfcPropertySet"):
+                    for p in props.HasProperties:
+                        if p.Name == "NetVolume":
+                            print(f"Raum: {space.Name}, Volumen: {p.NominalValue.wrappedValue} m³")
+
+    # Wände abrufen und mit zufälligen U-Werten versehen
+    walls = ifc_file.by_type("IfcWall")
+
+    # Fenster nach Himmelsrichtung analysieren
+    windows = ifc_file.by_type("IfcWindow")
+    window_dims = build_window_dim_index(ifc_file)
+    print("\nFensterflächenanalyse:")
+    print("=====================")
+
+    # Zeilen sammeln und gemeinsam ausgeben statt sieben print-Aufrufe pro Fenster
+    report_lines = []
+    for window in windows:
+        width, height, orientation = window_dims[window.id()]
+
+        if width and height:
+            area = round(width * height, 2)
+            report_lines.append(
+                f"Fenster {window.GlobalId}:\n"
+                f"  Name: {window.Name if window.Name else 'Unbenannt'}\n"
+                f"  Orientierung: {orientation}\n"
+                f"  Breite: {width} m\n"
+                f"  Höhe: {height} m\n"
+                f"  Fläche: {area} m²\n"
+                "  ---"
+            )
+    if report_lines:
+        print("\n".join(report_lines))
+
+    # Gesamtstatistik als Array-Reduktion, fehlende Maße zählen als 0
+    dims = np.array([(width or 0, height or 0) for width, height, _ in window_dims.values()], dtype=np.float64).reshape(-1, 2)
+    has_dimensions = (dims[:, 0] != 0) & (dims[:, 1] != 0)
+    total_window_area = float((dims[has_dimensions, 0] * dims[has_dimensions, 1]).sum())
+    window_count = len(dims)
+    windows_with_dimensions = int(has_dimensions.sum())
+
+    print("\nGesamtstatistik:")
+    print(f"Gesamtanzahl Fenster: {window_count}")
+    print(f"Fenster mit Maßangaben: {windows_with_dimensions}")
+    print(f"Gesamtfensterfläche: {round(total_window_area, 2)} m²")
+    print(f"Durchschnittliche Fensterfläche: {round(total_window_area/windows_with_dimensions if windows_with_dimensions > 0 else 0, 2)} m²")
+
+    print("\nProperty Set Diagnose:")
+    print("=====================")
+
+    # Erstes Fenster als Beispiel nehmen
+    if windows:
+        window = windows[0]
+        print(f"Gefundene Fenster: {len(windows)}")
+        print("\nVerfügbare Property Sets für erstes Fenster:")
+
+        for rel in window.IsDefinedBy:
+            if rel.is_a("IfcRelDefinesByProperties"):
+                props = rel.RelatingPropertyDefinition
+                if props.is_a("IfcPropertySet"):
+                    print(f"\nProperty Set Name: {props.Name}")
+                    print("Properties:")
+                    for prop in props.HasProperties:
+                        print(f"  - {prop.Name}: {prop.NominalValue.wrappedValue if hasattr(prop, 'NominalValue') else 'N/A'}")
+    else:
+        print("Keine Fenster in der IFC-Datei gefunden!")
 
 def create_owner_history(ifc_file):
     """Erstellt einen IfcOwnerHistory Eintrag falls nicht vorhanden"""
@@ -179,85 +192,117 @@ def create_owner_history(ifc_file):
         CreationDate=int(time.time())
     )
 
-def create_pset(ifc_file, pset_name: str, properties: list) -> object:
-    """Erstellt ein neues PropertySet"""
-    # Stelle sicher dass OwnerHistory existiert
-    owner_history = create_owner_history(ifc_file)
-    
+def create_pset(ifc_file, owner_history, pset_name: str, properties: list) -> object:
+    """Erstellt ein neues PropertySet
+
+    Args:
+        owner_history: IfcOwnerHistory, einmal pro Datei über create_owner_history ermittelt
+    """
+    # Konstruktoren einmal binden statt pro Property nachzuschlagen
+    create_single_value = ifc_file.createIfcPropertySingleValue
+    create_entity = ifc_file.create_entity
+
     pset = ifc_file.createIfcPropertySet(
         ifcopenshell.guid.new(),
         owner_history,
         pset_name,
         None,
-        [ifc_file.createIfcPropertySingleValue(name, None, ifc_file.create_entity(value_type, value), None)
+        [create_single_value(name, None, create_entity(value_type, value), None)
          for name, value_type, value in properties]
     )
     return pset
 
-def assign_pset(element, pset):
-    """Weist einem Element ein PropertySet zu"""
-    # Erstelle neue Relation wenn IsDefinedBy nicht existiert
-    if not hasattr(element, "IsDefinedBy"):
-        # Erstelle neue Relation
-        rel = element.file.createIfcRelDefinesByProperties(
-            ifcopenshell.guid.new(),
-            create_owner_history(element.file),
-            None,
-            None,
-            [element],
-            pset
-        )
+def build_pset_index(ifc_file):
+    """Ordnet allen Elementen ihre PropertySet-Relationen in einem Durchgang zu
+
+    Returns:
+        Dict Element-ID -> {PropertySet-Name: IfcRelDefinesByProperties}
+    """
+    index = {}
+    for rel in ifc_file.by_type("IfcRelDefinesByProperties"):
+        # IFC4 erlaubt ein IfcPropertySetDefinitionSet (Tupel) ohne Name, defekte Dateien auch null
+        name = getattr(rel.RelatingPropertyDefinition, "Name", None)
+        if name is None:
+            continue
+        for obj in rel.RelatedObjects:
+            index.setdefault(obj.id(), {}).setdefault(name, rel)
+    return index
+
+def assign_pset(element, pset, owner_history, pset_index=None):
+    """Weist einem Element ein PropertySet zu
+
+    Args:
+        pset_index: Optional Index aus build_pset_index, ersetzt die Suche über IsDefinedBy
+    """
+    if pset_index is not None:
+        existing = pset_index.get(element.id(), {}).get(pset.Name)
+    elif hasattr(element, "IsDefinedBy"):
+        # Wenn IsDefinedBy existiert, prüfe auf existierendes PropertySet
+        existing = next((rel for rel in element.IsDefinedBy
+                         if rel.is_a("IfcRelDefinesByProperties")
+                         and getattr(rel.RelatingPropertyDefinition, "Name", None) == pset.Name), None)
+    else:
+        existing = None
+
+    if existing is not None:
+        # Update existierendes PropertySet
+        existing.RelatingPropertyDefinition = pset
         return
 
-    # Wenn IsDefinedBy existiert, prüfe auf existierendes PropertySet
-    for rel in element.IsDefinedBy:
-        if rel.is_a("IfcRelDefinesByProperties"):
-            if rel.RelatingPropertyDefinition.Name == pset.Name:
-                # Update existierendes PropertySet
-                rel.RelatingPropertyDefinition = pset
-                return
-
     # Wenn kein passendes PropertySet gefunden wurde, füge neues hinzu
     rel = element.file.createIfcRelDefinesByProperties(
         ifcopenshell.guid.new(),
-        create_owner_history(element.file),
+        owner_history,
         None,
         None,
         [element],
         pset
     )
+    if pset_index is not None:
+        pset_index.setdefault(element.id(), {})[pset.Name] = rel
 
-def add_thermal_properties(ifc_file_path: str):
-    """Fügt thermische Eigenschaften zu Bauteilen hinzu und speichert die Datei"""
+def add_thermal_properties(ifc_file_path: str, seed=None):
+    """Fügt thermische Eigenschaften zu Bauteilen hinzu und speichert die Datei
+
+    Args:
+        ifc_file_path: Pfad zur IFC-Datei
+        seed: Optionaler Seed für reproduzierbare Zufallswerte
+    """
     ifc_file = ifcopenshell.open(ifc_file_path)
+    rng = np.random.default_rng(seed)
     
     print("\nFüge thermische Eigenschaften zu Dächern hinzu...")
     roofs = ifc_file.by_type("IfcRoof")
     print(f"Gefundene Dächer: {len(roofs)}")
     
-    for i, element in enumerate(roofs, 1):
-        u_value = round(random.uniform(0.8, 1.8), 2)
-        
-        pset = create_pset(ifc_file, "Pset_RoofCommon", [
-            ("ThermalTransmittance", "IfcThermalTransmittanceMeasure", u_value),
-            ("SolarAbsorption", "IfcPositiveRatioMeasure", round(random.uniform(0.5, 0.8), 2)),
-            ("Emissivity", "IfcPositiveRatioMeasure", round(random.uniform(0.8, 0.95), 2)),
-            ("Reflectance", "IfcPositiveRatioMeasure", round(random.uniform(0.2, 0.5), 2))
+    # Alle Zufallswerte in einem Aufruf ziehen: Spalten U-Wert, Absorption, Emissivität, Reflexion
+    low = np.array([0.8, 0.5, 0.8, 0.2])
+    high = np.array([1.8, 0.8, 0.95, 0.5])
+    roof_values = np.round(rng.uniform(low, high, size=(len(roofs), 4)), 2).tolist()
+    
+    # OwnerHistory einmal suchen bzw. anlegen statt pro Dach (by_type durchsucht die ganze Datei)
+    owner_history = create_owner_history(ifc_file)
+    # Bestehende PropertySets einmal indizieren statt IsDefinedBy pro Dach zu durchsuchen
+    pset_index = build_pset_index(ifc_file)
+    
+    for i, (element, values) in enumerate(zip(roofs, roof_values), 1):
+        pset = create_pset(ifc_file, owner_history, "Pset_RoofCommon", [
+            (name, value_type, value) for (name, value_type), value in zip(_ROOF_PROPERTIES, values)
         ])
         
-        assign_pset(element, pset)
-        print(f"Dach {i}/{len(roofs)} verarbeitet (U-Wert: {u_value})")
+        assign_pset(element, pset, owner_history, pset_index)
+        print(f"Dach {i}/{len(roofs)} verarbeitet (U-Wert: {values[0]})")
     
     # Speichern der Änderungen
     output_path = ifc_file_path
     ifc_file.write(output_path)
     print(f"\nDatei gespeichert unter: {output_path}")
 
-if __name__ == "__main__":
-    add_thermal_properties("data/ifc/Model.ifc")
-
-
-
-
-
+def main():
+    """Analysiert das Modell und ergänzt thermische Eigenschaften"""
+    ifc_file_path = "data/ifc/Model.ifc"
+    print_model_report(ifcopenshell.open(ifc_file_path))
+    add_thermal_properties(ifc_file_path)
 
+if __name__ == "__main__":
+    main()
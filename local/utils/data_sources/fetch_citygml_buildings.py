@@ -3,6 +3,7 @@ import sys
 from pathlib import Path
 import yaml
 import pandas as pd
+import numpy as np
 
 # Füge Projekt-Root zum Python-Path hinzu
 sys.path.append(str(Path(__file__).parent.parent.parent))
@@ -14,6 +15,7 @@ from utils.data_sources.fetch_wfs_data import ViennaWFS
 import uuid
 from lxml import etree
 import geopandas as gpd
+import shapely
 from shapely.geometry import Polygon, Point, MultiPolygon
 from shapely.ops import unary_union
 
@@ -30,6 +32,27 @@ class CityGMLBuildingProcessor(BaseBuildingProcessor):
             'gen': 'http://www.opengis.net/citygml/generics/1.0',
             'gml': 'http://www.opengis.net/gml'
         }
+        self._field_plan = self._compile_field_plan(self.citygml_mapping)
+
+    def _compile_field_plan(self, mapping):
+        """Löst das Feld-Mapping einmalig auf
+
+        Returns:
+            Liste von (Feld, XPath, Attributname, Elementpfad) in Mapping-Reihenfolge.
+            Für @-Attribute ist der Elementpfad None, für Elemente ist der
+            Attributname None und der Elementpfad './/bldg:<XPath>'.
+        """
+        plan = []
+        for field, xpath in mapping.items():
+            if xpath.startswith('@'):
+                attr_name = xpath[1:]  # Entferne das @-Zeichen
+                if ':' in attr_name:  # Behandle Namespace-Präfixe
+                    ns, attr = attr_name.split(':')
+                    attr_name = '{' + self.ns[ns] + '}' + attr
+                plan.append((field, xpath, attr_name, None))
+            else:
+                plan.append((field, xpath, None, f'.//bldg:{xpath}'))
+        return plan
 
     def extract_building_attributes(self, building):
         """Extrahiert alle relevanten Attribute eines Gebäudes"""
@@ -40,35 +63,24 @@ class CityGMLBuildingProcessor(BaseBuildingProcessor):
             gml_id = building.get('{' + self.ns['gml'] + '}id')
             attributes['Name'] = gml_id if gml_id else str(uuid.uuid4())
             
-            # Extrahiere CityGML-spezifische Attribute
-            for field, xpath in self.citygml_mapping.items():
+            # Extrahiere CityGML-spezifische Attribute (Mapping in __init__ aufgelöst)
+            for field, xpath, attr_name, element_path in self._field_plan:
                 print(f"\nVersuche Extraktion von {field} mit XPath: {xpath}")
                 # Behandle @-Attribute speziell
-                if xpath.startswith('@'):
-                    attr_name = xpath[1:]  # Entferne das @-Zeichen
-                    if ':' in attr_name:  # Behandle Namespace-Präfixe
-                        ns, attr = attr_name.split(':')
-                        attr_name = '{' + self.ns[ns] + '}' + attr
+                if element_path is None:
                     value = building.get(attr_name)
                     print(f"Attribut-Wert für {attr_name}: {value}")
-                    attributes[field] = value if value else ""
                 else:
                     # Normaler XPath für Elemente
-                    element = building.find(f'.//bldg:{xpath}', self.ns)
-                    value = ""
-                    if element is not None:
-                        # Prüfe auf uom-Attribut für Höhe
-                        if field == 'height_ag' and element.get('uom') is not None:
-                            value = element.text
-                        else:
-                            value = element.text
+                    element = building.find(element_path, self.ns)
+                    value = element.text if element is not None else ""
                     print(f"Element-Wert für {xpath}: {value}")
-                    attributes[field] = value if value else ""
+                attributes[field] = value if value else ""
             
             return attributes
 
         except Exception as e:
-            self.logger.error(f"Fehler bei Attributextraktion für Gebäude {attributes.get('Name', 'unbekannt')}: {str(e)}")
+            self.logger.error("Fehler bei Attributextraktion für Gebäude %s: %s", attributes.get('Name', 'unbekannt'), e)
             return attributes
 
     def process_citygml(self, citygml_path):
@@ -85,40 +97,28 @@ class CityGMLBuildingProcessor(BaseBuildingProcessor):
             
             building_data = []
             geometries = []
-            geometry_stats = {
-                'success': 0,
-                'failed': 0,
-                'total_area': 0,
-                'min_area': float('inf'),
-                'max_area': 0
-            }
             
             for building in buildings:
                 # Erst Geometrie extrahieren
                 footprint = self.extract_building_footprint(building)
-                if footprint:
-                    area = footprint.area
-                    geometry_stats['success'] += 1
-                    geometry_stats['total_area'] += area
-                    geometry_stats['min_area'] = min(geometry_stats['min_area'], area)
-                    geometry_stats['max_area'] = max(geometry_stats['max_area'], area)
-                else:
-                    geometry_stats['failed'] += 1
+                if not footprint:
                     continue
                 
                 # Dann Attribute extrahieren
                 building_data.append(self.extract_building_attributes(building))
                 geometries.append(footprint)
 
+            # Geometrie-Statistiken in einem Durchgang über alle Grundflächen
+            areas = shapely.area(np.asarray(geometries, dtype=object))
+
             # Ausgabe der Geometrie-Statistiken
             print("\n=== Geometrie-Verarbeitung Zusammenfassung ===")
-            print(f"Erfolgreich: {geometry_stats['success']} Gebäude")
-            print(f"Fehlgeschlagen: {geometry_stats['failed']} Gebäude")
-            if geometry_stats['success'] > 0:
-                avg_area = geometry_stats['total_area'] / geometry_stats['success']
-                print(f"Durchschnittliche Grundfläche: {avg_area:.1f}m²")
-                print(f"Kleinste Grundfläche: {geometry_stats['min_area']:.1f}m²")
-                print(f"Größte Grundfläche: {geometry_stats['max_area']:.1f}m²")
+            print(f"Erfolgreich: {len(geometries)} Gebäude")
+            print(f"Fehlgeschlagen: {len(buildings) - len(geometries)} Gebäude")
+            if areas.size > 0:
+                print(f"Durchschnittliche Grundfläche: {areas.mean():.1f}m²")
+                print(f"Kleinste Grundfläche: {areas.min():.1f}m²")
+                print(f"Größte Grundfläche: {areas.max():.1f}m²")
             
             # Erstelle GeoDataFrame
             buildings_gdf = gpd.GeoDataFrame(
@@ -146,7 +146,7 @@ class CityGMLBuildingProcessor(BaseBuildingProcessor):
                 # Erst Geometrie extrahieren
                 footprint = self.extract_building_footprint(building)
                 if isinstance(footprint, Point):
-                    self.logger.warning(f"Keine gültige Geometrie für Gebäude gefunden, überspringe...")
+                    self.logger.warning("Keine gültige Geometrie für Gebäude gefunden, überspringe...")
                     continue
                 
                 # Dann Attribute extrahieren
@@ -195,9 +195,12 @@ class CityGMLBuildingProcessor(BaseBuildingProcessor):
             for surface in surfaces:
                 coords = self._extract_surface_points(surface.text)
                 if coords and len(coords) >= 3:
-                    poly = Polygon(coords)
-                    if poly.is_valid:
-                        geometries.append(poly)
+                    geometries.append(Polygon(coords))
+
+            # Gültigkeit aller Flächen in einem GEOS-Aufruf prüfen
+            if geometries:
+                geometries = np.asarray(geometries, dtype=object)
+                geometries = list(geometries[shapely.is_valid(geometries)])
 
             if not geometries:
                 print(f"❌ Keine gültigen Polygone für Gebäude {building_id}")
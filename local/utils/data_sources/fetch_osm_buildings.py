@@ -1,9 +1,17 @@
 import osmnx as ox
+import numpy as np
+import pandas as pd
 import geopandas as gpd
+import shapely
 from shapely.ops import unary_union
-from pathlib import Path
-import yaml
 import logging
+import sys
+from pathlib import Path
+
+# Füge Projekt-Root zum Python-Path hinzu
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from utils.data_processing.config_loader import load_yaml
 
 logger = logging.getLogger(__name__)
 
@@ -19,14 +27,13 @@ def fetch_surrounding_buildings(site_gdf, distance=100):
 
         # Erstelle äußeren Buffer für Umgebungssuche
         outer_buffer = site_polygon.buffer(distance)
-        buffer_gdf = gpd.GeoDataFrame(geometry=[outer_buffer], crs=site_gdf.crs)
-        buffer_wgs84 = buffer_gdf.to_crs("EPSG:4326")
+        buffer_wgs84 = gpd.GeoSeries([outer_buffer], crs=site_gdf.crs).to_crs("EPSG:4326")
 
         logger.debug(f"🔍 OSM-Suchbereich (WGS84 Bounds): {buffer_wgs84.total_bounds}")
 
         # Hole Gebäude aus OSM
         tags = {'building': True}
-        buildings_gdf = ox.features_from_polygon(buffer_wgs84.geometry.iloc[0], tags=tags)
+        buildings_gdf = ox.features_from_polygon(buffer_wgs84.iloc[0], tags=tags)
 
         if buildings_gdf.empty:
             logger.warning("⚠️ Keine OSM-Gebäude gefunden!")
@@ -36,9 +43,11 @@ def fetch_surrounding_buildings(site_gdf, distance=100):
         buildings_gdf = buildings_gdf.to_crs(site_gdf.crs)
 
         # Filtere Gebäude, die sich außerhalb des Standorts befinden
-        outside_site = ~buildings_gdf.geometry.within(site_polygon)
-        within_search_area = buildings_gdf.geometry.intersects(outer_buffer)
-        buildings_gdf = buildings_gdf[outside_site & within_search_area]
+        # Beide Abfragen nutzen denselben räumlichen Index
+        sindex = buildings_gdf.sindex
+        within_search_area = sindex.query(outer_buffer, predicate='intersects')
+        inside_site = sindex.query(site_polygon, predicate='contains')
+        buildings_gdf = buildings_gdf.iloc[np.setdiff1d(within_search_area, inside_site)]
 
         logger.info(f"✅ OSM-Gebäude gefunden: {len(buildings_gdf)}")
         return buildings_gdf
@@ -48,6 +57,28 @@ def fetch_surrounding_buildings(site_gdf, distance=100):
         return gpd.GeoDataFrame(geometry=[], crs=site_gdf.crs)
 
 
+def _repair_polygons(polygons):
+    """Repariert Polygone mit make_valid und behält je Gebäude ein Polygon
+
+    make_valid macht z.B. aus einem Bow-Tie ein MultiPolygon, das der Polygon-Filter
+    verwerfen würde. Übernommen wird daher der größte Polygon-Teil, ohne Polygon-Teil
+    bleibt die ursprüngliche Geometrie erhalten.
+    """
+    repaired = shapely.make_valid(polygons)
+    parts, source = shapely.get_parts(repaired, return_index=True)
+    is_polygon = shapely.get_type_id(parts) == 3
+    parts, source = parts[is_polygon], source[is_polygon]
+
+    # Größten Teil je Gebäude wählen: nach Gebäude, dann absteigender Fläche sortieren
+    order = np.lexsort((-shapely.area(parts), source))
+    first = np.unique(source[order], return_index=True)[1]
+    largest = order[first]
+
+    result = polygons.copy()
+    result[source[largest]] = parts[largest]
+    return result
+
+
 def process_osm_buildings(buildings_gdf, osm_defaults):
     """
     Verarbeitet OSM-Gebäude und erstellt erforderliche Attribute
@@ -58,28 +89,40 @@ def process_osm_buildings(buildings_gdf, osm_defaults):
         logger.warning("⚠️ Keine OSM-Gebäude zu verarbeiten!")
         return gpd.GeoDataFrame(geometry=[], crs=buildings_gdf.crs)
 
-    processed_rows = []
-    for i, row in buildings_gdf.iterrows():
-        if not hasattr(row.geometry, 'exterior'):
-            logger.warning(f"⚠️ Gebäude {i} übersprungen: Keine Polygon-Geometrie")
-            continue
-
-        floors = row.get('building:levels', osm_defaults.get('default_floors', 3))
-        try:
-            floors = int(floors)
-        except (ValueError, TypeError):
-            floors = osm_defaults.get('default_floors', 3)
-
-        processed_rows.append({
-            'Name': f'OSM_{i}',
-            'height_ag': floors * osm_defaults.get('floor_height', 3),
-            'floors_ag': floors,
+    # Ungültige OSM-Polygone gesammelt reparieren (ein GEOS-Aufruf statt pro Gebäude)
+    geometries = buildings_gdf.geometry.to_numpy()
+    invalid = ~shapely.is_valid(geometries) & (shapely.get_type_id(geometries) == 3)
+    if invalid.any():
+        logger.info("🔧 Repariere %d ungültige OSM-Geometrien", invalid.sum())
+        geometries = geometries.copy()
+        geometries[invalid] = _repair_polygons(geometries[invalid])
+        buildings_gdf = buildings_gdf.set_geometry(gpd.GeoSeries(geometries, index=buildings_gdf.index, crs=buildings_gdf.crs))
+
+    # Nur Polygone übernehmen (Typ-ID 3), Prüfung für alle Geometrien auf einmal
+    is_polygon = shapely.get_type_id(buildings_gdf.geometry.to_numpy()) == 3
+    for i in buildings_gdf.index[~is_polygon]:
+        logger.warning("⚠️ Gebäude %s übersprungen: Keine Polygon-Geometrie", i)
+    buildings_gdf = buildings_gdf[is_polygon]
+
+    # Geschosszahl spaltenweise: nur ganze Zahlen übernehmen, sonst Default (wie int('2.5') -> Fehler)
+    default_floors = osm_defaults.get('default_floors', 3)
+    if 'building:levels' in buildings_gdf.columns:
+        levels = pd.to_numeric(buildings_gdf['building:levels'], errors='coerce')
+        floors = levels.where(levels.notna() & (levels % 1 == 0), default_floors).astype(int)
+    else:
+        floors = pd.Series(default_floors, index=buildings_gdf.index, dtype=int)
+
+    processed_gdf = gpd.GeoDataFrame(
+        {
+            'Name': [f'OSM_{i}' for i in buildings_gdf.index],
+            'height_ag': (floors * osm_defaults.get('floor_height', 3)).to_numpy(),
+            'floors_ag': floors.to_numpy(),
             'category': osm_defaults.get('category', 'residential'),
             'REFERENCE': osm_defaults.get('REFERENCE', ''),
-            'geometry': row.geometry
-        })
-
-    processed_gdf = gpd.GeoDataFrame(processed_rows, crs=buildings_gdf.crs)
+        },
+        geometry=buildings_gdf.geometry.to_numpy(),
+        crs=buildings_gdf.crs
+    )
     logger.info(f"✅ OSM-Gebäude verarbeitet: {len(processed_gdf)} Gebäude")
     return processed_gdf
 
@@ -88,7 +131,7 @@ def save_surrounding_buildings(buildings_gdf, output_path):
     """Speichert die Umgebungsgebäude als Shapefile"""
     try:
         logger.info(f"💾 Speichere OSM-Gebäude nach: {output_path}")
-        buildings_gdf.to_file(output_path, driver='ESRI Shapefile')
+        buildings_gdf.to_file(output_path, driver='ESRI Shapefile', engine='pyogrio')
         logger.info("✅ Umgebungsgebäude erfolgreich gespeichert")
     except Exception as e:
         logger.error(f"❌ Fehler beim Speichern der OSM-Gebäude: {str(e)}", exc_info=True)
@@ -100,8 +143,7 @@ def load_config():
         config_path = Path(__file__).resolve().parent.parent.parent / 'cfg' / 'project_config.yml'
         logger.info(f"📂 Lade OSM-Konfiguration: {config_path}")
 
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        config = load_yaml(config_path)
 
         return config.get('surroundings', {})
 
@@ -146,7 +188,7 @@ def main():
         if not site_path.exists():
             raise FileNotFoundError(f"❌ site.shp nicht gefunden in {site_path}")
 
-        site_gdf = gpd.read_file(site_path)
+        site_gdf = gpd.read_file(site_path, engine="pyogrio")
         osm_buildings = fetch_osm_buildings(site_gdf, distance=config['surroundings']['surrounding_buildings_distance'])
 
         if osm_buildings.empty:
@@ -1,10 +1,17 @@
 import osmnx as ox
 import geopandas as gpd
 import pandas as pd
+import numpy as np
+import shapely
 from shapely.ops import transform
 from pyproj import Transformer
+import sys
 from pathlib import Path
-import yaml
+
+# Füge Projekt-Root zum Python-Path hinzu
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from utils.data_processing.config_loader import load_yaml
 
 def fetch_streets_within_site(site_gdf, config):
     """
@@ -48,12 +55,9 @@ def fetch_streets_within_site(site_gdf, config):
     
     # Verarbeite die highway-Typen und handle Listen
     if 'highway' in edges.columns:
-        highway_types = {}
-        for highway in edges['highway']:
-            # Wenn es eine Liste ist, nehme den ersten Typ
-            if isinstance(highway, list):
-                highway = highway[0]
-            highway_types[highway] = highway_types.get(highway, 0) + 1
+        # Wenn es eine Liste ist, nehme den ersten Typ
+        highways = edges['highway'].map(lambda highway: highway[0] if isinstance(highway, list) else highway)
+        highway_types = highways.value_counts(sort=False, dropna=False)
         
         # Gib die Statistik aus
         for highway_type, count in highway_types.items():
@@ -67,11 +71,21 @@ def process_streets(edges_gdf):
     """
     print("Verarbeite Straßennetz")
     
+    # Start- und Endpunkte aller Segmente auf einmal bestimmen
+    geometries = edges_gdf.geometry.to_numpy()
+    start_points = shapely.get_point(geometries, 0)
+    end_points = shapely.get_point(geometries, -1)
+
+    def _format_points(points):
+        x = np.char.mod('%.2f', shapely.get_x(points))
+        y = np.char.mod('%.2f', shapely.get_y(points))
+        return pd.Series(np.char.add(np.char.add(x, ','), y), index=edges_gdf.index, dtype=object)
+
     # Erstelle GeoDataFrame mit benötigten Spalten
     streets_gdf = gpd.GeoDataFrame(
         {
-            'u': edges_gdf.apply(lambda x: f"{x.geometry.coords[0][0]:.2f},{x.geometry.coords[0][1]:.2f}", axis=1),
-            'v': edges_gdf.apply(lambda x: f"{x.geometry.coords[-1][0]:.2f},{x.geometry.coords[-1][1]:.2f}", axis=1),
+            'u': _format_points(start_points),
+            'v': _format_points(end_points),
             'key': range(len(edges_gdf))
         },
         geometry=edges_gdf.geometry,
@@ -91,7 +105,7 @@ def save_streets(streets_gdf, output_path):
     # Stelle sicher, dass der Ausgabeordner existiert
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
-    streets_gdf.to_file(output_path, driver='ESRI Shapefile')
+    streets_gdf.to_file(output_path, driver='ESRI Shapefile', engine='pyogrio')
     print("Straßennetz erfolgreich gespeichert")
 
 def load_config():
@@ -101,8 +115,7 @@ def load_config():
         config_path = Path(__file__).resolve().parent.parent.parent / 'cfg' / 'data_sources' / 'osm_config.yml'
         print(f"Lade OSM Konfiguration: {config_path}")
         
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        config = load_yaml(config_path)
             
         return config.get('streets', {})
         
@@ -153,11 +166,6 @@ def main():
         config = load_config()
         if not config:
             raise ValueError("Keine gültige OSM Konfiguration gefunden")
-            
-        # Weitere Verarbeitung...
-        
-        # Lade Konfiguration
-        config = load_config()
         print("Konfiguration geladen")
         
         # Erstelle Pfade
@@ -169,7 +177,7 @@ def main():
         if not site_path.exists():
             raise FileNotFoundError(f"site.shp nicht gefunden in {site_path}")
         
-        site_gdf = gpd.read_file(site_path)
+        site_gdf = gpd.read_file(site_path, engine="pyogrio")
         
         # Hole OSM-Straßen
         streets = fetch_streets_within_site(site_gdf, config)
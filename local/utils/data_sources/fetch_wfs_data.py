@@ -1,19 +1,43 @@
 from owslib.wfs import WebFeatureService
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
 import geopandas as gpd
 import yaml
 from typing import Optional
 from pathlib import Path
 import logging
+import sys
+import threading
+
+# Füge Projekt-Root zum Python-Path hinzu
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from utils.data_processing.config_loader import load_yaml
 
 # Logger einrichten
 logger = logging.getLogger("ViennaWFS")
 logger.setLevel(logging.DEBUG)
 
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
+# Handler nur einmal anhängen, sonst wird bei erneutem Import jede Meldung mehrfach ausgegeben
+if not logger.handlers:
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.INFO)
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    console_handler.setFormatter(formatter)
+    logger.addHandler(console_handler)
+
+# Cache für WFS-Abfragen, Schlüssel: (Layer, gerundete Bounding Box)
+# Begrenzt wie config_loader._YAML_CACHE, älteste Einträge werden verdrängt
+_FEATURE_CACHE: "OrderedDict[tuple, gpd.GeoDataFrame]" = OrderedDict()
+_FEATURE_CACHE_MAX = 32
+_FEATURE_CACHE_LOCK = threading.Lock()
+
+
+def clear_feature_cache():
+    """Leert den Cache der WFS-Abfragen"""
+    with _FEATURE_CACHE_LOCK:
+        _FEATURE_CACHE.clear()
 
 class ViennaWFS:
     """Klasse für den Zugriff auf WFS-Dienste der Stadt Wien"""
@@ -23,17 +47,60 @@ class ViennaWFS:
         self.wfs_url = 'https://data.wien.gv.at/daten/geo'
         self.wfs_version = '1.1.0'
         self.crs = 'urn:x-ogc:def:crs:EPSG:31256'
-        self.wfs = WebFeatureService(url=self.wfs_url, version=self.wfs_version)
         
         # Lade die normalisierte WFS-Konfiguration
         config_path = Path(__file__).resolve().parent.parent.parent / "cfg" / "data_sources" / "vienna_wfs_normalized.yml"
-        with open(config_path, "r", encoding="utf-8") as file:
-            self.base_config = yaml.safe_load(file)
+        self.base_config = load_yaml(config_path)
         
         self.wfs_config = wfs_config or []
+
+        # Stream-Konfigurationen nach Layer indizieren (erster Eintrag gewinnt)
+        self._streams_by_layer = {}
+        for stream in self.wfs_config:
+            self._streams_by_layer.setdefault(stream['layer'], stream)
+
         logger.info(f"WFS-Service initialisiert: {self.wfs_url}")
 
-    def fetch_building_model(self, bbox) -> Optional[gpd.GeoDataFrame]:
+    @cached_property
+    def wfs(self) -> WebFeatureService:
+        """WFS-Client, wird erst bei der ersten Abfrage erstellt (GetCapabilities)"""
+        return WebFeatureService(url=self.wfs_url, version=self.wfs_version)
+
+    def get_stream_config(self, layer_name) -> Optional[dict]:
+        """Gibt die Stream-Konfiguration für einen Layer zurück"""
+        return self._streams_by_layer.get(layer_name)
+
+    def _get_features(self, typename, bbox, force_refresh=False) -> gpd.GeoDataFrame:
+        """Lädt Features eines Layers, bereits geladene Bereiche kommen aus dem Cache
+
+        Args:
+            force_refresh: Cache ignorieren und neu vom WFS laden
+        """
+        key = (typename, None if bbox is None else tuple(round(float(v), 2) for v in bbox))
+        with _FEATURE_CACHE_LOCK:
+            cached = None if force_refresh else _FEATURE_CACHE.get(key)
+            if cached is not None:
+                _FEATURE_CACHE.move_to_end(key)
+
+        if cached is not None:
+            logger.info(f"♻️ Verwende gecachte WFS-Daten für {typename}")
+        else:
+            response = self.wfs.getfeature(
+                typename=typename,
+                bbox=bbox,
+                srsname=self.crs
+            )
+            cached = gpd.read_file(response, engine="pyogrio")
+            with _FEATURE_CACHE_LOCK:
+                _FEATURE_CACHE[key] = cached
+                _FEATURE_CACHE.move_to_end(key)
+                if len(_FEATURE_CACHE) > _FEATURE_CACHE_MAX:
+                    _FEATURE_CACHE.popitem(last=False)
+
+        # Kopie zurückgeben, damit Aufrufer den Cache nicht verändern
+        return cached.copy()
+
+    def fetch_building_model(self, bbox, force_refresh=False) -> Optional[gpd.GeoDataFrame]:
         """Lädt das Baukörpermodell"""
         try:
             logger.info("Lade Baukörpermodell...")
@@ -42,19 +109,16 @@ class ViennaWFS:
                 logger.error("❌ Ungültige Bounding Box für WFS-Abfrage")
                 return None
             
-            response = self.wfs.getfeature(
-                typename='ogdwien:FMZKBKMOGD',
-                bbox=bbox,
-                srsname=self.crs
-            )
-            
-            buildings_gdf = gpd.read_file(response)
+            buildings_gdf = self._get_features('ogdwien:FMZKBKMOGD', bbox, force_refresh)
 
             if 'geometry' not in buildings_gdf.columns:
                 logger.error("❌ WFS-Daten enthalten keine Geometrie! Überprüfe die Abfrage.")
                 return None
 
-            buildings_gdf["height"] = buildings_gdf["O_KOTE"].astype(float) - buildings_gdf["U_KOTE"].astype(float)
+            kote = buildings_gdf[["O_KOTE", "U_KOTE"]]
+            if not all(dtype.kind == 'f' for dtype in kote.dtypes):
+                kote = kote.astype(float)
+            buildings_gdf["height"] = kote["O_KOTE"] - kote["U_KOTE"]
 
             logger.info(f"✅ {len(buildings_gdf)} Gebäude geladen")
             return buildings_gdf
@@ -63,16 +127,11 @@ class ViennaWFS:
             logger.error(f"❌ Fehler beim Laden des Baukörpermodells: {str(e)}", exc_info=True)
             return None
 
-    def fetch_building_typology(self, bbox) -> Optional[gpd.GeoDataFrame]:
+    def fetch_building_typology(self, bbox, force_refresh=False) -> Optional[gpd.GeoDataFrame]:
         """Lädt die Gebäudetypologie für den gegebenen Bereich"""
         try:
             logger.info("Lade Gebäudetypologie...")
-            response = self.wfs.getfeature(
-                typename='ogdwien:GEBAEUDETYPOGD',
-                bbox=bbox,
-                srsname=self.crs
-            )
-            typology_gdf = gpd.read_file(response)
+            typology_gdf = self._get_features('ogdwien:GEBAEUDETYPOGD', bbox, force_refresh)
 
             if 'geometry' not in typology_gdf.columns:
                 logger.error("❌ Fehler: WFS-Daten enthalten keine Geometrie!")
@@ -85,22 +144,36 @@ class ViennaWFS:
             return None
         
 
-    def enrich_buildings(self, site_gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
-        """Erweitert Gebäudedaten mit WFS-Daten und behält die Geometrie."""
+    def enrich_buildings(self, site_gdf: gpd.GeoDataFrame, force_refresh=False) -> gpd.GeoDataFrame:
+        """Erweitert Gebäudedaten mit WFS-Daten und behält die Geometrie.
+
+        Args:
+            force_refresh: WFS-Daten neu laden statt aus dem Cache
+        """
         try:
             bbox = tuple(site_gdf.total_bounds)
-            building_model = self.fetch_building_model(bbox)
-            building_typology = self.fetch_building_typology(bbox)
+            # WFS-Client vorab im aufrufenden Thread erstellen: cached_property ist nicht
+            # gesperrt, sonst würden beide Threads je einen Client (GetCapabilities) bauen
+            self.wfs
+            # Beide Layer sind unabhängig, daher parallel abrufen
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                model_future = executor.submit(self.fetch_building_model, bbox, force_refresh)
+                typology_future = executor.submit(self.fetch_building_typology, bbox, force_refresh)
+                building_model = model_future.result()
+                building_typology = typology_future.result()
 
             if building_model is not None and not building_model.empty:
                 if 'geometry' not in building_model.columns:
                     print("❌ Fehler: 'geometry' fehlt in WFS-Building Model")
                     return site_gdf  # Rückgabe der Originaldaten mit Geometrie
 
-                enriched_gdf = building_model.copy()
+                # building_model ist ein frisch geladenes Objekt, merge erzeugt ohnehin einen neuen Frame
+                enriched_gdf = building_model
 
                 if building_typology is not None and not building_typology.empty:
-                    enriched_gdf = enriched_gdf.merge(building_typology, left_on="FMZK_ID", right_on="OBJECTID", how="left")
+                    # Nur die Attribute der Typologie übernehmen, die Geometrie kommt aus dem Baukörpermodell
+                    typology_attributes = building_typology.drop(columns='geometry')
+                    enriched_gdf = enriched_gdf.merge(typology_attributes, left_on="FMZK_ID", right_on="OBJECTID", how="left")
 
                 # Sicherstellen, dass Geometrie erhalten bleibt
                 enriched_gdf = gpd.GeoDataFrame(enriched_gdf, geometry='geometry', crs=site_gdf.crs)
@@ -114,19 +187,17 @@ class ViennaWFS:
             return site_gdf  # Fehler -> Rückgabe der Originaldaten mit Geometrie
 
 
-    def fetch_layer(self, layer_name, bbox=None) -> Optional[gpd.GeoDataFrame]:
-        """Lädt einen WFS Layer und validiert Geometrie"""
+    def fetch_layer(self, layer_name, bbox=None, force_refresh=False) -> Optional[gpd.GeoDataFrame]:
+        """Lädt einen WFS Layer und validiert Geometrie
+
+        Args:
+            force_refresh: Layer neu laden statt aus dem Cache
+        """
         try:
             logger.info(f"Lade WFS Layer: {layer_name}")
             typename = layer_name if "ogdwien:" in layer_name else f"ogdwien:{layer_name}"
             
-            response = self.wfs.getfeature(
-                typename=typename,
-                bbox=bbox,
-                srsname=self.crs
-            )
-            
-            data_gdf = gpd.read_file(response)
+            data_gdf = self._get_features(typename, bbox, force_refresh)
 
             if data_gdf is None or data_gdf.empty:
                 logger.warning(f"⚠️ Keine Daten für Layer {layer_name} erhalten")
@@ -151,7 +222,7 @@ def fetch_wfs_data(site_polygon, layer_name, config):
         wfs = ViennaWFS(config.get('wfs_streams', []))
 
         # Stream-Konfiguration abrufen
-        stream_config = next((s for s in wfs.wfs_config if s['layer'] == layer_name), None)
+        stream_config = wfs.get_stream_config(layer_name)
         if not stream_config:
             raise ValueError(f"⚠️ Keine Konfiguration gefunden für Layer: {layer_name}")
 
@@ -8,8 +8,14 @@ import geopandas as gpd
 from typing import Dict, List, Tuple
 from CityGMLInspect import CityGMLInspector
 import uuid
+import sys
 import xml.etree.ElementTree as ET
 
+# Füge Projekt-Root zum Python-Path hinzu
+sys.path.append(str(Path(__file__).parent.parent.parent.parent))
+
+from utils.data_processing.config_loader import load_yaml
+
 class CityGML2IFC:
     def __init__(self, citygml_path, inspector_results=None):
         """Initialisiert den Konverter mit CityGML Pfad und optionalen Inspektionsergebnissen"""
@@ -613,13 +619,11 @@ class CityGML2IFC:
     def _load_mapping(self):
         """Lädt das CityGML zu IFC Mapping aus der YAML-Datei"""
         try:
-            import yaml
-            mapping_path = Path(__file__) / "mapping" / "citygml_to_ifc.yml"
+            mapping_path = Path(__file__).parent / "mapping" / "citygml_to_ifc.yml"
             
-            with open(mapping_path, 'r', encoding='utf-8') as f:
-                mapping = yaml.safe_load(f)
-                print(f"Mapping-Datei erfolgreich geladen: {mapping_path.name}")
-                return mapping
+            mapping = load_yaml(mapping_path)
+            print(f"Mapping-Datei erfolgreich geladen: {mapping_path.name}")
+            return mapping
             
         except Exception as e:
             print(f"Fehler beim Laden der Mapping-Datei: {str(e)}")
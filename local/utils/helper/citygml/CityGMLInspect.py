@@ -1,14 +1,21 @@
 import xml.etree.ElementTree as ET
+import sys
 from pathlib import Path
-import yaml
 from typing import List, Dict
 import geopandas as gpd
+import shapely
 from shapely.geometry import Polygon, MultiPolygon
 import pandas as pd
 import numpy as np
 import math
 from scipy.spatial import ConvexHull
 
+# Füge Projekt-Root zum Python-Path hinzu
+sys.path.append(str(Path(__file__).parent.parent.parent.parent))
+
+from utils.data_processing.config_loader import load_yaml
+
+
 class CityGMLInspector:
     def __init__(self, citygml_path: Path):
         self.citygml_path = Path(citygml_path)
@@ -29,11 +36,16 @@ class CityGMLInspector:
         
         # Lade Mapping-Datei aus dem neuen Pfad
         mapping_path = Path(__file__).parent / "mapping" / "citygml_to_ifc.yml"
-        with open(mapping_path, 'r', encoding='utf-8') as f:
-            self.mapping = yaml.safe_load(f)
+        self.mapping = load_yaml(mapping_path)
         
         # Namespaces aus Mapping-Datei laden
         self.ns = self.mapping['namespaces']['citygml_1_0']
+
+        # Validierungsregeln einmalig aus dem Mapping lesen
+        validations = self.mapping.get('validations', {}).get('building', {})
+        self._min_height = validations.get('min_height', 2.0)
+        self._max_height = validations.get('max_height', 100.0)
+        self._min_area = validations.get('min_footprint_area', 4.0)
         
     def inspect_file(self):
         """Analysiert die CityGML-Datei und gibt strukturierte Gebäudedaten zurück"""
@@ -512,11 +524,10 @@ class CityGMLInspector:
             'errors': []
         }
         
-        # Lade Validierungsregeln aus dem Mapping
-        validations = self.mapping.get('validations', {}).get('building', {})
-        min_height = validations.get('min_height', 2.0)
-        max_height = validations.get('max_height', 100.0)
-        min_area = validations.get('min_footprint_area', 4.0)
+        # Validierungsregeln aus __init__
+        min_height = self._min_height
+        max_height = self._max_height
+        min_area = self._min_area
         
         # Prüfe Höhe
         height = building_data.get('height')
@@ -710,12 +721,25 @@ class CityGMLInspector:
 
     def _calculate_nearest_neighbor(self, gdf: gpd.GeoDataFrame) -> dict:
         """Berechnet Statistiken zu den nächsten Nachbarn"""
-        distances = []
-        for idx, building in gdf.iterrows():
-            other_buildings = gdf[gdf.index != idx]
-            if not other_buildings.empty:
-                min_distance = other_buildings.distance(building.geometry).min()
-                distances.append(min_distance)
+        # Ein STRtree für alle Gebäude statt Abstand zu allen anderen pro Gebäude
+        geometries = gdf.geometry.to_numpy()
+        tree = shapely.STRtree(geometries)
+        (input_idx, _), pair_distances = tree.query_nearest(
+            geometries, exclusive=True, return_distance=True
+        )
+
+        # Bei gleich weit entfernten Nachbarn gibt es mehrere Paare pro Gebäude
+        distances = np.full(len(geometries), np.inf)
+        np.minimum.at(distances, input_idx, pair_distances)
+
+        # exclusive=True überspringt auch identische Grundrisse anderer Gebäude,
+        # deren Abstand ist aber 0 (nur das Gebäude selbst wird ausgeschlossen)
+        left, right = tree.query(geometries, predicate='covers')
+        others = left != right
+        left, right = left[others], right[others]
+        duplicates = left[shapely.equals(geometries[left], geometries[right])]
+        distances[duplicates] = 0.0
+        distances = distances[np.isfinite(distances)]
         
         return {
             'mean_distance': np.mean(distances),